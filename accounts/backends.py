@@ -3,6 +3,8 @@ from django.contrib.auth.backends import ModelBackend
 
 UserModel = get_user_model()
 
+_USERNAME_FIELD_NAME = UserModel.USERNAME_FIELD
+
 
 class UsernameOrPhoneModelBackend(ModelBackend):
     def authenticate(self, request, username=None, phone=None, password=None, **kwargs):
@@ -12,10 +14,10 @@ class UsernameOrPhoneModelBackend(ModelBackend):
             query = {"phone": phone}
 
         elif username:
-            query = {UserModel.USERNAME_FIELD: username}
+            query = {_USERNAME_FIELD_NAME: username}
 
-        elif username is None and kwargs.get(UserModel.USERNAME_FIELD):
-            query = {UserModel.USERNAME_FIELD: kwargs.get(UserModel.USERNAME_FIELD)}
+        elif username is None and kwargs.get(_USERNAME_FIELD_NAME):
+            query = {_USERNAME_FIELD_NAME: kwargs.get(_USERNAME_FIELD_NAME)}
 
         if not query or not password:
             return
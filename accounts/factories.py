@@ -6,6 +6,8 @@ from factory.django import DjangoModelFactory
 
 UserModel = get_user_model()
 
+DEFAULT_PASSWORD = 'secret'
+
 
 class UserFactory(DjangoModelFactory):
     class Meta:
@@ -18,4 +20,4 @@ class UserFactory(DjangoModelFactory):
         lambda obj: '{}.{}.{}'.format(obj.first_name, obj.last_name, random.randrange(1, 1000)))
     email = factory.lazy_attribute(lambda obj: '{}@email.com'.format(obj.username))
     phone = factory.Sequence(lambda n: '3215616_%d' % n)
-    password = factory.PostGenerationMethodCall('set_password', 'secret')
+    password = factory.django.Password(DEFAULT_PASSWORD)
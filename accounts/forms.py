@@ -4,17 +4,76 @@ from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.forms import UserChangeForm as BaseUserChangeForm
 from django.contrib.auth.forms import UserCreationForm as BaseUserCreationForm
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
-from accounts.verify_phone import VerifyPhone
+from accounts.verify_phone import verify_phone
 
 UserModel = get_user_model()
 
+_PHONE_FIELD_NAME = UserModel.REQUIRED_FIELDS[0]
+_USERNAME_FIELD_NAME = UserModel.USERNAME_FIELD
+
+_PHONE_FIELD = UserModel._meta.get_field(_PHONE_FIELD_NAME)
+_USERNAME_FIELD = UserModel._meta.get_field(_USERNAME_FIELD_NAME)
+
+# email and phone are unique on the user model. emails are stored lowercased on every write path,
+# so the exact lookups below use that index, which is also the final guard against two requests
+# claiming the same value at once
+_UNIQUE_ERROR_MESSAGES = {
+    'email': "Email already exists",
+    'phone': "Phone already exists",
+}
+
+
+def _get_violated_names(error):
+    # only constraint or column names are inspected, never the rest of the message which may hold the value
+    constraint_name = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if constraint_name:
+        return [constraint_name]
+
+    message = str(error)
+    if 'for key ' in message:
+        # mysql: Duplicate entry '...' for key 'accounts_user.email'
+        return [message.rsplit('for key ', 1)[1].strip(" '\"")]
+    if message.startswith('UNIQUE constraint failed:'):
+        # sqlite: UNIQUE constraint failed: accounts_user.email
+        return [column.strip() for column in message.split(':', 1)[1].split(',')]
+    return []
+
+
+def get_unique_violation_field(error):
+    for name in _get_violated_names(error):
+        parts = name.replace('.', '_').split('_')
+        for field in _UNIQUE_ERROR_MESSAGES:
+            if field in parts:
+                return field
+    return None
+
+
+def unique_violation_error(field):
+    return ValidationError({field: ValidationError(_UNIQUE_ERROR_MESSAGES[field], code="unique")})
+
 
 class UserCreationForm(BaseUserCreationForm):
     class Meta(BaseUserCreationForm.Meta):
         model = UserModel
 
+    def save(self, commit=True):
+        user = super().save(commit=False)
+        if commit:
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError as error:
+                field = get_unique_violation_field(error)
+                if field is None:
+                    raise
+                raise unique_violation_error(field) from error
+            self._save_m2m()
+        return user
+
 
 class RegisterForm(UserCreationForm):
     username = forms.CharField(
@@ -33,17 +92,35 @@ class RegisterForm(UserCreationForm):
         model = UserModel
         fields = ("username", 'email', 'phone', 'password1', 'password2')
 
-    def clean_phone(self):
-        phone = self.cleaned_data['phone']
-        if UserModel.objects.filter(phone=phone).exists():
-            raise ValidationError("Phone already exists", code="unique")
-        return phone
+    def clean(self):
+        cleaned_data = super().clean()
+        # the model lowercases the email later in _post_clean, compare the stored form
+        email = (cleaned_data.get('email') or '').lower()
+        phone = cleaned_data.get('phone')
+
+        lookup = Q()
+        if email:
+            lookup |= Q(email=email)
+        if phone:
+            lookup |= Q(phone=phone)
 
-    def clean_email(self):
-        email = self.cleaned_data['email']
-        if UserModel.objects.filter(email=email).exists():
-            raise ValidationError("Email already exists", code="unique")
-        return email
+        if lookup:
+            # one round-trip for both unique fields, errors are attributed in python
+            taken = list(UserModel.objects.filter(lookup).values_list('email', 'phone'))
+            if email and email in {taken_email for taken_email, taken_phone in taken}:
+                self.add_error('email', ValidationError(_UNIQUE_ERROR_MESSAGES['email'], code="unique"))
+            if phone and phone in {taken_phone for taken_email, taken_phone in taken}:
+                self.add_error('phone', ValidationError(_UNIQUE_ERROR_MESSAGES['phone'], code="unique"))
+
+        return cleaned_data
+
+    def validate_unique(self):
+        # email and phone were already checked together in clean(), skip the per field queries
+        exclude = set(self._get_validation_exclusions()) | set(_UNIQUE_ERROR_MESSAGES)
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
 
 
 class PhoneLoginForm(forms.Form):
@@ -73,7 +150,7 @@ class PhoneLoginForm(forms.Form):
         self.request = request
         self.user_cache = None
         super(PhoneLoginForm, self).__init__(*args, **kwargs)
-        self.username_field = UserModel._meta.get_field(UserModel.USERNAME_FIELD)
+        self.username_field = _USERNAME_FIELD
 
     def get_user(self):
         return self.user_cache
@@ -81,42 +158,33 @@ class PhoneLoginForm(forms.Form):
     def clean(self):
         username = self.cleaned_data.get('username')
         phone = self.cleaned_data.get('phone')
-        password = self.cleaned_data.get('password')
-        remember_me = self.cleaned_data.get('remember_me')
-        login_by = None
 
         if not phone and not username:
             raise ValidationError(
                 self.error_messages['phone_or_username_are_required'],
                 code='phone_or_username_are_required',
                 params={
-                    'phone': UserModel._meta.get_field('phone').verbose_name,
+                    'phone': _PHONE_FIELD.verbose_name,
                     'username': self.username_field.verbose_name,
                 })
 
-        credentials = {"password": password}
+        password = self.cleaned_data.get('password')
+        if not password:
+            return self.cleaned_data
 
         if phone:
-            login_by = phone
-            credentials.update({"phone": phone})
-
-        elif username:
-            login_by = username
-            credentials.update({UserModel.USERNAME_FIELD: username})
-
-        if login_by and password:
-            self.user_cache = authenticate(request=self.request, **credentials)
-            if not self.user_cache:
-                raise ValidationError(
-                    self.error_messages['invalid_login'],
-                    code='invalid_login',
-                    params={'phone': UserModel._meta.get_field('phone').verbose_name})
-            if not remember_me:
-                self.request.session.set_expiry(0)
-                self.request.session.modified = True
-            else:
-                if not self.user_cache.is_active:
-                    raise ValidationError(self.error_messages['inactive'], code='inactive')
+            credentials = {"phone": phone, "password": password}
+        else:
+            credentials = {_USERNAME_FIELD_NAME: username, "password": password}
+
+        self.user_cache = authenticate(request=self.request, **credentials)
+        if not self.user_cache:
+            raise ValidationError(
+                self.error_messages['invalid_login'],
+                code='invalid_login',
+                params={'phone': _PHONE_FIELD.verbose_name})
+        if not self.user_cache.is_active:
+            raise ValidationError(self.error_messages['inactive'], code='inactive')
 
         return self.cleaned_data
 
@@ -132,7 +200,10 @@ class VerifyPhoneForm(forms.Form):
     def clean(self):
         code = self.cleaned_data.get('code')
 
-        success = VerifyPhone().check(self.user.phone, code)
+        if self.user.phone_verified_at is not None:
+            raise ValidationError(_("This phone number was verified before"), code='already_verified')
+
+        success = verify_phone.check(self.user.phone, code)
         if not success:
             raise ValidationError(_("The Provided code is Properly invalid"), code='invalid_code')
 
@@ -150,7 +221,7 @@ class UserChangeForm(BaseUserChangeForm):
         super().__init__(*args, **kwargs)
 
 
-class UpdateUserDataForm(UserChangeForm):
+class UpdateUserDataForm(forms.ModelForm):
     class Meta:
         model = UserModel
         fields = ('first_name', 'last_name')
@@ -170,6 +241,7 @@ class UpdateUserDataForm(UserChangeForm):
         return last_name
 
 
+# expects the already loaded request.user, only its email and password are read
 class UpdateEmailForm(forms.Form):
     new_email = forms.EmailField(required=True, label=_("New Email"))
     password = forms.CharField(required=True,
@@ -191,24 +263,20 @@ class UpdateEmailForm(forms.Form):
 
     def clean_new_email(self):
         old_email = self.user.email
-        email = self.cleaned_data.get('new_email')
+        email = self.cleaned_data.get('new_email').lower()
+
+        if old_email.lower() == email:
+            raise ValidationError(_("Please Enter the new Email"), code="email_mismatch")
 
         if UserModel.objects.filter(email=email).exists():
             raise ValidationError(_("Email already exists"), code="unique")
 
-        if old_email == email:
-            raise ValidationError(_("Please Enter the new Email"), code="email_mismatch")
-
         return email
 
     def clean_password(self):
-        username = self.user.email
         password = self.cleaned_data.get('password')
 
-        credentials = {"password": password}
-        credentials.update({UserModel.USERNAME_FIELD: username})
-
-        if not authenticate(**credentials):
+        if not self.user.check_password(password):
             raise ValidationError(_("Please Enter Valid Password"), code="invalid")
 
         return password
@@ -217,10 +285,11 @@ class UpdateEmailForm(forms.Form):
         email = self.cleaned_data["new_email"]
         self.user.email = email
         if commit:
-            self.user.save()
+            self.user.save(update_fields=['email'])
         return self.user
 
 
+# expects the already loaded request.user, only its phone and password are read
 class UpdatePhoneNumberForm(forms.Form):
     new_phone = forms.CharField(required=True)
     password = forms.CharField(
@@ -239,23 +308,24 @@ class UpdatePhoneNumberForm(forms.Form):
     def __init__(self, user=None, *args, **kwargs):
         self.user = user
         super(UpdatePhoneNumberForm, self).__init__(*args, **kwargs)
-        self.phone_field = UserModel._meta.get_field(UserModel.REQUIRED_FIELDS[0])
+        self.phone_field = _PHONE_FIELD
 
     def clean_new_phone(self):
+        old_phone = self.user.phone
         phone = self.cleaned_data['new_phone']
+
+        if old_phone == phone:
+            raise ValidationError(_("Please Enter the new Phone"), code="phone_mismatch")
+
         if UserModel.objects.filter(phone=phone).exists():
             raise ValidationError("Phone already exists", code="unique")
         return phone
 
     def clean(self):
-        phone = self.user.phone
         password = self.cleaned_data.get('password')
-        credentials = {"password": password}
-
-        credentials.update({"phone": phone})
 
-        if phone and password:
-            authenticated_user = authenticate(**credentials)
+        if password and not self.user.check_password(password):
+            self.add_error('password', ValidationError(_("Please Enter Valid Password"), code="invalid"))
 
         return self.cleaned_data
 
@@ -263,5 +333,5 @@ class UpdatePhoneNumberForm(forms.Form):
         phone = self.cleaned_data["new_phone"]
         self.user.phone = phone
         if commit:
-            self.user.save()
+            self.user.save(update_fields=['phone'])
         return self.user
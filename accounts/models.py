@@ -15,7 +15,7 @@ class UserManager(BaseUserManager):
         """Create and save a User with the given email and password."""
         if not email:
             raise ValueError(_('The given email must be set'))
-        email = self.normalize_email(email)
+        email = self.normalize_email(email).lower()
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
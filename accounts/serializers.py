@@ -57,6 +57,7 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password2')
         password = validated_data.pop('password1')
+        validated_data['email'] = validated_data['email'].lower()
         user = super(RegisterSerializer, self).create(validated_data)
         user.set_password(password)
         user.save()
@@ -1,21 +1,110 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import translation
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from django.utils.translation import gettext as _
 
 from accounts.tokens import account_activation_token
 
+logger = logging.getLogger(__name__)
+
+_TEMPLATE = get_template('accounts/confirm_email_template.html')
+
+# emails queued within this window share one SMTP connection
+_BATCH_WINDOW = 0.25
+_MAX_PENDING = 100
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='activation-email')
+_pending = []
+_pending_lock = threading.Lock()
+
+
+def get_activation_params(user):
+    return urlsafe_base64_encode(force_bytes(user.pk)), account_activation_token.make_token(user)
+
+
+def send_activation_email(mail_subject, user, domain, uid, token, activation_path, language, connection=None):
+    # rendered in the language of the request even when running on a worker thread
+    with translation.override(language):
+        message = _TEMPLATE.render({
+            'user': user,
+            'domain': domain,
+            'uid': uid,
+            'token': token,
+            'activation_path': activation_path,
+        })
+    EmailMessage(mail_subject, message, settings.EMAIL_HOST_USER, [user.email], connection=connection).send()
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        logger.exception("Failed to close connection for activation emails")
+
+
+def _flush():
+    time.sleep(_BATCH_WINDOW)
+    with _pending_lock:
+        batch = _pending[:]
+        _pending.clear()
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception:
+        # without a shared connection every email still gets its own attempt
+        logger.exception("Failed to open connection for activation emails, sending them one by one")
+        connection = None
+
+    try:
+        for args in batch:
+            try:
+                send_activation_email(*args, connection=connection)
+            except Exception:
+                logger.exception("Failed to send activation email")
+                # the shared connection may be broken now, the rest of the batch gets its own
+                if connection is not None:
+                    _close_quietly(connection)
+                    connection = None
+    finally:
+        if connection is not None:
+            _close_quietly(connection)
+
+
+def _dispatch(*args):
+    with _pending_lock:
+        queue_is_full = len(_pending) >= _MAX_PENDING
+        if not queue_is_full:
+            _pending.append(args)
+            schedule_flush = len(_pending) == 1
+
+    # the queue is full, send on the request thread instead of growing it
+    if queue_is_full:
+        send_activation_email(*args)
+    elif schedule_flush:
+        _executor.submit(_flush)
+
 
 def send_mail_confirmation(request, user):
     current_site = get_current_site(request)
-    mail_subject = _('Activate your account.')
-    message = render_to_string('accounts/confirm_email_template.html', {
-        'user': user,
-        'domain': current_site.domain,
-        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
-        'token': account_activation_token.make_token(user),
-    })
-    send_mail(mail_subject, message, settings.EMAIL_HOST_USER, [user.email])
+    uid, token = get_activation_params(user)
+    # reversed here, the script prefix and urlconf are thread local and missing on the worker thread
+    activation_path = reverse('verify-email', kwargs={'uidb64': uid, 'token': token})
+    args = (_('Activate your account.'), user, current_site.domain, uid, token, activation_path,
+            translation.get_language())
+
+    if getattr(settings, 'ACTIVATION_EMAIL_ASYNC', False):
+        transaction.on_commit(lambda: _dispatch(*args))
+    else:
+        send_activation_email(*args)
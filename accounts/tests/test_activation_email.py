@@ -0,0 +1,114 @@
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import get_script_prefix, set_script_prefix
+from django.utils import translation
+
+from accounts.factories import UserFactory
+from accounts.services import activation_email
+
+
+def wait_for_pending_emails():
+    # the executor has a single worker, so this returns once every queued flush has run
+    activation_email._executor.submit(lambda: None).result()
+
+
+@mock.patch.object(activation_email, '_BATCH_WINDOW', 0)
+class SendMailConfirmationTestCase(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.user = UserFactory()
+
+    def test_it_sends_the_email_inline_by_default(self):
+        activation_email.send_mail_confirmation(self.request, self.user)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Activate your account.')
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+
+    @override_settings(ACTIVATION_EMAIL_ASYNC=True)
+    def test_it_waits_for_the_transaction_to_commit_when_async(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            activation_email.send_mail_confirmation(self.request, self.user)
+        wait_for_pending_emails()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(ACTIVATION_EMAIL_ASYNC=True)
+    def test_it_sends_the_email_from_the_worker_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            activation_email.send_mail_confirmation(self.request, self.user)
+        wait_for_pending_emails()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+
+    @override_settings(ACTIVATION_EMAIL_ASYNC=True)
+    def test_it_renders_the_email_in_the_request_language(self):
+        with translation.override('fr'), self.captureOnCommitCallbacks(execute=True):
+            activation_email.send_mail_confirmation(self.request, self.user)
+        wait_for_pending_emails()
+        self.assertIn("Merci d’utiliser notre site", mail.outbox[0].body)
+
+    @override_settings(ACTIVATION_EMAIL_ASYNC=True)
+    def test_it_keeps_the_script_prefix_in_the_activation_link(self):
+        script_prefix = get_script_prefix()
+        set_script_prefix('/app/')
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                activation_email.send_mail_confirmation(self.request, self.user)
+        finally:
+            set_script_prefix(script_prefix)
+        wait_for_pending_emails()
+        self.assertIn('testserver/app/accounts/verify/email/', mail.outbox[0].body)
+
+    @override_settings(ACTIVATION_EMAIL_ASYNC=True)
+    @mock.patch.object(activation_email, '_MAX_PENDING', 0)
+    def test_it_sends_inline_if_the_queue_is_full(self):
+        with mock.patch.object(activation_email._executor, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                activation_email.send_mail_confirmation(self.request, self.user)
+        submit.assert_not_called()
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(ACTIVATION_EMAIL_ASYNC=True)
+class ActivationEmailBatchTestCase(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.users = [UserFactory(), UserFactory()]
+
+    def queue_emails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in self.users:
+                activation_email.send_mail_confirmation(self.request, user)
+        wait_for_pending_emails()
+
+    def test_it_sends_emails_queued_in_the_same_window_over_one_connection(self):
+        with mock.patch.object(activation_email, 'get_connection', wraps=activation_email.get_connection) as connect:
+            self.queue_emails()
+        connect.assert_called_once_with()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIsNotNone(mail.outbox[0].connection)
+        self.assertIs(mail.outbox[0].connection, mail.outbox[1].connection)
+
+    def test_it_sends_the_rest_on_their_own_if_the_shared_connection_drops(self):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = SMTPServerDisconnected
+        with mock.patch.object(activation_email, 'get_connection', return_value=connection), \
+                self.assertLogs('accounts.services.activation_email', 'ERROR'):
+            self.queue_emails()
+        connection.send_messages.assert_called_once()
+        connection.close.assert_called_once_with()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.users[1].email])
+
+    @mock.patch.object(activation_email, '_BATCH_WINDOW', 0)
+    def test_it_sends_each_email_on_its_own_if_the_shared_connection_fails(self):
+        connection = mock.Mock()
+        connection.open.side_effect = OSError
+        with mock.patch.object(activation_email, 'get_connection', return_value=connection), \
+                self.assertLogs('accounts.services.activation_email', 'ERROR'):
+            self.queue_emails()
+        self.assertEqual(len(mail.outbox), 2)
+        connection.send_messages.assert_not_called()
@@ -4,13 +4,15 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.test import TestCase, RequestFactory
 from django.test import override_settings
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from accounts.factories import UserFactory
-from accounts.forms import PhoneLoginForm, RegisterForm, VerifyPhoneForm
+from accounts.forms import PhoneLoginForm, RegisterForm, VerifyPhoneForm, get_unique_violation_field
 from accounts.forms import UpdateUserDataForm, UpdateEmailForm, UpdatePhoneNumberForm
 
 UserModel = get_user_model()
@@ -119,6 +121,9 @@ class RegisterFormValidationTest(TestCase):
     def test_email_is_unique(self):
         check_unique(self, "email", "first@aol.com")
 
+    def test_email_is_unique_regardless_of_case(self):
+        check_unique(self, "email", "First@aol.com")
+
     def test_password1_is_required(self):
         check_required(self, 'password1')
 
@@ -135,6 +140,16 @@ class RegisterFormValidationTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertEquals(form.errors.as_data()["password2"][0].code, 'password_mismatch')
 
+    def test_save_raises_unique_error_if_phone_was_taken_after_validation(self):
+        self.DEFAULT_DATA.update({"username": "TestUser"})
+        form = RegisterForm(data=self.DEFAULT_DATA)
+        self.assertTrue(form.is_valid())
+        UserModel.objects.create_user(
+            email='second@aol.com', username="Second User", phone=self.DEFAULT_DATA['phone'])
+        with self.assertRaises(ValidationError) as context:
+            form.save()
+        self.assertEquals(context.exception.error_dict['phone'][0].code, 'unique')
+
 
 class PhoneLoginFormStructureTestCase(TestCase):
     def setUp(self):
@@ -272,15 +287,14 @@ class PhoneLoginFormValidationTestCase(TestCase):
         self.DEFAULT_DATA.pop('username')
         form = self.Form(request=self.request, data=self.DEFAULT_DATA)
         form.is_valid()
-        print(form.errors)
         self.assertEquals(form.get_user(), self.user)
 
-    def test_it_sets_session_expiry_to_zero_if_remember_me_is_false(self):
+    @override_settings(AUTHENTICATION_BACKENDS=['accounts.backends.UsernameOrPhoneModelBackend'])
+    def test_it_does_not_change_session_expiry_if_remember_me_is_false(self):
         self.DEFAULT_DATA.update({"remember_me": False})
         form = self.Form(request=self.request, data=self.DEFAULT_DATA)
         self.assertTrue(form.is_valid())
-        self.assertIn('_session_expiry', self.request.session)
-        self.assertEquals(0, self.request.session['_session_expiry'])
+        self.assertNotIn('_session_expiry', self.request.session)
 
 
 class VerifyPhoneFormTestCase(TestCase):
@@ -322,6 +336,13 @@ class VerifyPhoneFormValidationTestCase(TestCase):
         form = VerifyPhoneForm(user=self.user, data=self.data)
         self.assertTrue(form.is_valid())
 
+    @override_settings(PHONE_VERIFY_SERVICE="accounts.tests.mocks.MockVerifyService")
+    def test_it_fails_without_checking_the_code_if_phone_was_verified_before(self):
+        self.user.phone_verified_at = now()
+        form = VerifyPhoneForm(user=self.user, data=self.data)
+        self.assertFalse(form.is_valid())
+        self.assertEquals('already_verified', form.errors.as_data()['__all__'][0].code)
+
 
 # profile tests
 
@@ -443,14 +464,36 @@ class UpdateEmailFormValidationTest(TestCase):
         self.assertFalse(form.is_valid())
 
     def test_email_from_throw_error_if_email_is_email_is_already_exists(self):
+        UserFactory(email='other@test.test')
         default_data = {
-            "new_email": 'test@test.test',
+            "new_email": 'other@test.test',
             "password": "secret",
         }
         form = UpdateEmailForm(data=default_data, user=self.user)
         self.assertFalse(form.is_valid())
         self.assertEquals(form.errors.as_data()['new_email'][0].code, 'unique')
 
+    def test_email_from_throw_error_if_email_exists_in_different_case(self):
+        UserFactory(email='other@test.test')
+        default_data = {
+            "new_email": 'Other@test.test',
+            "password": "secret",
+        }
+        form = UpdateEmailForm(data=default_data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEquals(form.errors.as_data()['new_email'][0].code, 'unique')
+
+    def test_it_saves_the_new_email_lowercased(self):
+        data = {
+            "new_email": 'New@New.com',
+            "password": "secret",
+        }
+        form = UpdateEmailForm(data=data, user=self.user)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'new@new.com')
+
     def test_email_field_throw_error_if_old_email_equal_new_email(self):
         default_data = {
             "new_email": 'test@test.test',
@@ -458,7 +501,7 @@ class UpdateEmailFormValidationTest(TestCase):
         }
         form = UpdateEmailForm(data=default_data, user=self.user)
         self.assertFalse(form.is_valid())
-        self.assertEquals(form.errors.as_data()['new_email'][0].code, 'unique')
+        self.assertEquals(form.errors.as_data()['new_email'][0].code, 'email_mismatch')
 
     def test_email_from_throw_error_if_email_is_invalid(self):
         data = {
@@ -543,10 +586,51 @@ class UpdatePhoneFormValidationTest(TestCase):
         form = UpdatePhoneNumberForm(data={}, user=self.user)
         self.assertFalse(form.is_valid())
 
+    def test_phone_from_throw_error_if_password_is_invalid(self):
+        data = {
+            "new_phone": '+201005263977',
+            "password": "fake",
+        }
+        form = UpdatePhoneNumberForm(data=data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['password'][0].code, 'invalid')
+
     def test_phone_from_throw_error_if_new_phone_already_exists(self):
+        UserFactory(phone="+201005263999")
+        default_data = {
+            "new_phone": '+201005263999',
+            "password": "secret",
+        }
+        form = UpdatePhoneNumberForm(data=default_data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEquals(form.errors.as_data()['new_phone'][0].code, 'unique')
+
+    def test_phone_field_throw_error_if_old_phone_equal_new_phone(self):
         default_data = {
             "new_phone": '+201005263988',
             "password": "secret",
         }
         form = UpdatePhoneNumberForm(data=default_data, user=self.user)
         self.assertFalse(form.is_valid())
+        self.assertEquals(form.errors.as_data()['new_phone'][0].code, 'phone_mismatch')
+
+
+class UniqueViolationFieldTestCase(TestCase):
+    def test_it_reads_the_column_from_sqlite_message(self):
+        error = IntegrityError('UNIQUE constraint failed: accounts_user.phone')
+        self.assertEquals(get_unique_violation_field(error), 'phone')
+
+    def test_it_reads_the_key_from_mysql_message(self):
+        error = IntegrityError("Duplicate entry 'phone@email.com' for key 'accounts_user.email'")
+        self.assertEquals(get_unique_violation_field(error), 'email')
+
+    def test_it_reads_the_postgres_constraint_name(self):
+        cause = Exception()
+        cause.diag = type('Diag', (), {'constraint_name': 'accounts_user_phone_key'})()
+        error = IntegrityError('duplicate key value violates unique constraint, Key (phone)=(email)')
+        error.__cause__ = cause
+        self.assertEquals(get_unique_violation_field(error), 'phone')
+
+    def test_it_returns_none_for_other_integrity_errors(self):
+        error = IntegrityError('NOT NULL constraint failed: accounts_user.email_phone_note')
+        self.assertIsNone(get_unique_violation_field(error))
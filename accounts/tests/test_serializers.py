@@ -1,4 +1,4 @@
-from django.contrib.auth import password_validation
+from django.contrib.auth import get_user_model, password_validation
 from django.contrib.auth.models import User
 from django.test import TestCase
 from django.utils.translation import gettext as _
@@ -7,6 +7,8 @@ from rest_framework import serializers
 from accounts.serializers import LogoutSerializer, RegisterSerializer, UpdateUserDataSerializer, UpdateEmailSerializer, \
     UpdatePhoneNumberSerializer
 
+UserModel = get_user_model()
+
 
 class RegistrationSerializerTestCase(TestCase):
     def setUp(self):
@@ -170,3 +172,30 @@ class UpdatePhoneSerializerStructureTestCase(TestCase):
 
     def test_it_has_password_field(self):
         self.assertIn('password', self.serializer.fields)
+
+
+class RegisterSerializerValidationTestCase(TestCase):
+    def setUp(self):
+        UserModel.objects.create_user(
+            email='first@aol.com', username="First User", first_name="First",
+            last_name="User", phone="+201005263987")
+        self.data = {
+            "email": "test@test.test",
+            "username": "TestUser",
+            "phone": "+201005263988",
+            "password1": "newTESTPasswordD",
+            "password2": "newTESTPasswordD",
+        }
+
+    def test_it_rejects_an_existing_email_in_different_case(self):
+        self.data.update({"email": "First@aol.com"})
+        serializer = RegisterSerializer(data=self.data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('email', serializer.errors)
+
+    def test_it_stores_the_email_lowercased(self):
+        self.data.update({"email": "Test@Test.test"})
+        serializer = RegisterSerializer(data=self.data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        user = serializer.save()
+        self.assertEquals(user.email, 'test@test.test')
@@ -1,5 +1,6 @@
 from django.test import TestCase, override_settings
 
+from accounts.tests.mocks import MockVerifyService, TestingVerifyService
 from accounts.verify_phone import VerifyPhone, VerifyPhoneServiceAbstract
 
 
@@ -34,3 +35,17 @@ class VerifyPhoneGetServiceClassTestCase(TestCase):
     def test_it_returns_subclass_of_verify_phone_abstract(self):
         class_ = VerifyPhone().get_service_class()
         self.assertIsInstance(class_, VerifyPhoneServiceAbstract)
+
+
+class VerifyPhoneServiceCacheTestCase(TestCase):
+    @override_settings(PHONE_VERIFY_SERVICE="accounts.tests.mocks.MockVerifyService")
+    def test_it_reuses_the_service_between_calls(self):
+        verify_phone = VerifyPhone()
+        self.assertIs(verify_phone.service, verify_phone.service)
+
+    def test_it_rebuilds_the_service_if_setting_changes(self):
+        verify_phone = VerifyPhone()
+        with override_settings(PHONE_VERIFY_SERVICE="accounts.tests.mocks.MockVerifyService"):
+            self.assertIsInstance(verify_phone.service, MockVerifyService)
+        with override_settings(PHONE_VERIFY_SERVICE="accounts.tests.mocks.TestingVerifyService"):
+            self.assertIsInstance(verify_phone.service, TestingVerifyService)
@@ -4,8 +4,6 @@ from django.core import mail
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone, dateformat
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status
@@ -17,17 +15,33 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from ..factories import UserFactory
-from ..tokens import account_activation_token
+from ..services.activation_email import get_activation_params
 from ..views_api import UpdateProfileDataAPIView, UpdateEmailAPIView, UpdatePhoneAPIView, \
     VerifyPhoneAPIView, VerifyEmailAPIView, ResendPhoneConfirmationAPIView, UserLogoutAPIView
 
 
+_URLS = {name: reverse('api-v1:accounts:{}'.format(name)) for name in (
+    'token_obtain_pair',
+    'verify-phone',
+    'resend-email-activation',
+    'logout',
+    'signup',
+    'resend_phone_activation',
+    'profile_info',
+    'update_email',
+    'update_phone',
+)}
+
+
 # test auth
 
 class SimpleJWTLoginTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
     def setUp(self):
-        self.url = reverse('api-v1:accounts:token_obtain_pair')
-        self.user = UserFactory()
+        self.url = _URLS['token_obtain_pair']
         self.client = APIClient()
 
     def test_it_return_401_if_not_active_user_tried_to_autheticate(self):
@@ -59,7 +73,7 @@ class SimpleJWTLoginTestCase(TestCase):
     def test_it_return_401_if_invalid_token_was_given(self):
         client = APIClient()
         client.credentials(HTTP_AUTHORIZATION='Bearer ' + 'abc')
-        response = client.get(reverse('api-v1:accounts:verify-phone'))
+        response = client.get(_URLS['verify-phone'])
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_the_returned_token_is_valid(self):
@@ -68,7 +82,7 @@ class SimpleJWTLoginTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
         token = response.data['access']
         client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(token))
-        response = client.get(reverse('api-v1:accounts:resend-email-activation'))
+        response = client.get(_URLS['resend-email-activation'])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
@@ -91,34 +105,40 @@ class TestUserLogoutViewStructure(TestCase):
 
 
 class TestUserLogoutView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
     def setUp(self):
-        self.url = reverse('api-v1:accounts:token_obtain_pair')
-        self.user = UserFactory()
+        self.url = _URLS['token_obtain_pair']
         self.client = APIClient()
         login_response = self.client.post(self.url, {'email': self.user.email, 'password': 'secret'})
         self.refresh = login_response.data['refresh']
         self.token = login_response.data['access']
 
     def test_it_return_401_if_user_not_logged_in(self):
-        response = self.client.post(reverse('api-v1:accounts:logout'), {'refresh': self.refresh})
+        response = self.client.post(_URLS['logout'], {'refresh': self.refresh})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_it_return_204_if_user_is_logged_out(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.token))
-        response = self.client.post(reverse('api-v1:accounts:logout'), {'refresh': self.refresh})
+        response = self.client.post(_URLS['logout'], {'refresh': self.refresh})
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
     def test_it_return_400_if_invalid_token_was_given(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.token))
-        response = self.client.post(reverse('api-v1:accounts:logout'), {'refresh': 'abc'})
+        response = self.client.post(_URLS['logout'], {'refresh': 'abc'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
 class UserSignupAPIViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory()
-        self.url = reverse('api-v1:accounts:signup')
+        self.url = _URLS['signup']
         self.data = {
             "email": "test@test.test",
             "username": "TestUser",
@@ -176,12 +196,15 @@ class VerifyPhoneAPIViewStructureTestCase(TestCase):
 
 
 class VerifyPhoneAPIViewPOSTTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(phone="12312123")
+        cls.refresh = RefreshToken.for_user(cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory(phone="12312123")
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.url = reverse("api-v1:accounts:verify-phone")
+        self.url = _URLS['verify-phone']
         self.data = {"code": "777777"}
 
     def test_it_return_401_status_code_if_user_is_not_logged_in(self):
@@ -232,12 +255,15 @@ class ResendPhoneConfirmationViewStructureTestCase(TestCase):
 
 
 class PhoneConfirmationViewGETTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.refresh = RefreshToken.for_user(cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory()
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.url = reverse("api-v1:accounts:resend_phone_activation")
+        self.url = _URLS['resend_phone_activation']
 
     def test_it_returns_status_code_of_401_if_user_is_not_authenticated(self):
         self.client.logout()
@@ -272,25 +298,28 @@ class VerifyEmailViewStructureTestCase(TestCase):
 
 
 class VerifyEmailAPIViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.refresh = RefreshToken.for_user(cls.user)
+        cls.uid, cls.token = get_activation_params(cls.user)
+        cls.url = reverse('api-v1:accounts:verify-email', args=[cls.uid, cls.token])
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory()
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.uid = urlsafe_base64_encode(force_bytes(self.user.pk))
-        self.token = account_activation_token.make_token(self.user)
 
     def test_it_activate_the_user(self):
-        response = self.client.get(reverse('api-v1:accounts:verify-email', args=[self.uid, self.token]))
+        response = self.client.get(self.url)
         self.user.refresh_from_db()
         self.assertIsNotNone(self.user.email_verified_at)
 
     def test_it_return_200_status_code_when_email_was_confirmed_successfully(self):
-        response = self.client.get(reverse('api-v1:accounts:verify-email', args=[self.uid, self.token]))
+        response = self.client.get(self.url)
         self.assertEquals(response.status_code, 200)
 
     def test_message_value_when_email_was_verified(self):
-        response = self.client.get(reverse('api-v1:accounts:verify-email', args=[self.uid, self.token]))
+        response = self.client.get(self.url)
         self.assertEquals(response.data['message'], _('Email was verified successfully.'))
 
 
@@ -317,12 +346,15 @@ class UpdateProfileDataAPIViewStructureTestCase(TestCase):
 
 
 class UpdateProfileDataAPIViewTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.refresh = RefreshToken.for_user(cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory()
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.url = reverse('api-v1:accounts:profile_info')
+        self.url = _URLS['profile_info']
         self.data = {
             'first_name': self.user.first_name,
             'last_name': self.user.last_name,
@@ -379,12 +411,15 @@ class UpdateEmailAPIViewStructureTestCase(TestCase):
 
 
 class UpdateEmailAPIViewTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(email='test@test.com')
+        cls.refresh = RefreshToken.for_user(cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory(email='test@test.com')
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.url = reverse('api-v1:accounts:update_email')
+        self.url = _URLS['update_email']
         self.data = {
             'new_email': "newtest@test.com",
             "password": "secret",
@@ -415,10 +450,8 @@ class UpdateEmailAPIViewTestCase(APITestCase):
         self.assertEquals(response.status_code, 422)
 
     def test_it_change_email_for_user(self):
-        print(self.user.email)
         self.client.put(self.url, data=self.data)
         self.user.refresh_from_db()
-        print(self.user.email)
         self.assertEquals(self.user.email, self.data['new_email'])
 
 
@@ -445,12 +478,15 @@ class UpdatePhoneAPIViewStructure(TestCase):
 
 
 class UpdatePhoneAPIViewTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(phone='+201005263977')
+        cls.refresh = RefreshToken.for_user(cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = UserFactory(phone='+201005263977')
-        self.refresh = RefreshToken.for_user(self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(self.refresh.access_token))
-        self.url = reverse('api-v1:accounts:update_phone')
+        self.url = _URLS['update_phone']
         self.data = {
             'new_phone': "+201005263988",
             "password": "secret",
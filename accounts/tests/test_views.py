@@ -77,6 +77,24 @@ class LoginViewPOSTTestCase(TestCase):
         response = client.post(reverse('login'))
         self.assertRedirects(response, settings.LOGIN_REDIRECT_URL, fetch_redirect_response=False)
 
+    @override_settings(PHONE_AUTHENTICATION_ACTIVE=True,
+                       AUTHENTICATION_BACKENDS=['accounts.backends.UsernameOrPhoneModelBackend'])
+    def test_it_sets_session_expiry_to_zero_if_remember_me_is_false(self):
+        client = Client()
+        user = UserFactory()
+        client.post(reverse('login'), {'phone': user.phone, 'password': 'secret', 'remember_me': False})
+        self.assertIn('_auth_user_id', client.session)
+        self.assertTrue(client.session.get_expire_at_browser_close())
+
+    @override_settings(PHONE_AUTHENTICATION_ACTIVE=True,
+                       AUTHENTICATION_BACKENDS=['accounts.backends.UsernameOrPhoneModelBackend'])
+    def test_it_keeps_session_expiry_if_remember_me_is_true(self):
+        client = Client()
+        user = UserFactory()
+        client.post(reverse('login'), {'phone': user.phone, 'password': 'secret', 'remember_me': True})
+        self.assertIn('_auth_user_id', client.session)
+        self.assertFalse(client.session.get_expire_at_browser_close())
+
 
 class RegisterViewStructureTestCase(TestCase):
     def test_it_extends_django_view_class(self):
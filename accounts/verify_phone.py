@@ -19,7 +19,17 @@ class VerifyPhoneServiceAbstract(ABC):
 
 class VerifyPhone:
     def __init__(self):
-        self.service = self.get_service_class()
+        self._service = None
+        self._service_name = None
+
+    @property
+    def service(self):
+        # built once and reused so the provider client keeps its connections open,
+        # rebuilt only if PHONE_VERIFY_SERVICE changes
+        if self._service is None or self._service_name != settings.PHONE_VERIFY_SERVICE:
+            self._service_name = settings.PHONE_VERIFY_SERVICE
+            self._service = self.get_service_class()
+        return self._service
 
     def send(self, phone):
         return self.service.send(phone)
@@ -35,3 +45,6 @@ class VerifyPhone:
         module_name = split_service_name[:-1]
         service_class = getattr(importlib.import_module('.'.join(module_name)), class_name)
         return service_class()
+
+
+verify_phone = VerifyPhone()
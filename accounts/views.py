@@ -6,6 +6,7 @@ from django.contrib.auth import login, get_user_model
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView as BaseLoginView
+from django.core.exceptions import ValidationError
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.utils.encoding import force_text
@@ -19,7 +20,7 @@ from .forms import PhoneLoginForm, UserCreationForm, VerifyPhoneForm
 from .forms import UpdatePhoneNumberForm, UpdateEmailForm, UserChangeForm
 from .services.activation_email import send_mail_confirmation
 from .tokens import account_activation_token
-from .verify_phone import VerifyPhone
+from .verify_phone import verify_phone
 
 
 class UpdateProfileInfoView(LoginRequiredMixin, View):
@@ -95,6 +96,12 @@ class LoginView(BaseLoginView):
             return PhoneLoginForm
         return getattr(settings, 'LOGIN_FORM', AuthenticationForm)
 
+    def form_valid(self, form):
+        remember_me = form.cleaned_data.get('remember_me', True)
+        if not remember_me and not self.request.session.get_expire_at_browser_close():
+            self.request.session.set_expiry(0)
+        return super().form_valid(form)
+
 
 class RegisterView(View):
     def get_form_class(self):
@@ -113,10 +120,16 @@ class RegisterView(View):
 
         form = self.get_form_class()(request.POST)
         if form.is_valid():
-            user = form.save()
+            try:
+                user = form.save()
+            except ValidationError as error:
+                form.add_error(None, error)
+                return render(self.request, 'accounts/register.html', {
+                    "form": form
+                })
             login(self.request, user)
             send_mail_confirmation(request, user)
-            VerifyPhone().send(user.phone)
+            verify_phone.send(user.phone)
             if 'next' in request.POST:
                 return redirect(request.POST.get('next'))
             return redirect(settings.LOGIN_REDIRECT_URL)
@@ -157,7 +170,7 @@ class PhoneVerificationCompleteView(LoginRequiredMixin, View):
 class ResendPhoneConfirmationView(LoginRequiredMixin, View):
 
     def get(self, request, *args, **kwargs):
-        VerifyPhone().send(request.user.phone)
+        verify_phone.send(request.user.phone)
         messages.success(request, _("A new confirmation code has been sent to your phone"))
         return redirect(reverse("verify-phone"))
 
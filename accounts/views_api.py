@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
 from django.utils.encoding import force_text
 from django.utils.http import urlsafe_base64_decode
 from django.utils.timezone import now
@@ -13,11 +14,11 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.forms import UpdateEmailForm, UpdatePhoneNumberForm
-from .forms import VerifyPhoneForm
+from .forms import VerifyPhoneForm, get_unique_violation_field, unique_violation_error
 from .serializers import LogoutSerializer, PasswordResetSerializer, UpdateUserDataSerializer, RegisterSerializer
 from .services.activation_email import send_mail_confirmation
 from .tokens import account_activation_token
-from .verify_phone import VerifyPhone
+from .verify_phone import verify_phone
 
 UserModel = get_user_model()
 
@@ -33,9 +34,17 @@ class UserSignupAPIView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            self.user = serializer.save()
+            try:
+                with transaction.atomic():
+                    self.user = serializer.save()
+            except IntegrityError as error:
+                field = get_unique_violation_field(error)
+                if field is None:
+                    raise
+                return Response(unique_violation_error(field).message_dict,
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
             send_mail_confirmation(request, self.user)
-            VerifyPhone().send(self.user.phone)
+            verify_phone.send(self.user.phone)
             refresh = RefreshToken.for_user(self.user)
             return Response({"access_token": str(refresh.access_token), "refresh_token": str(refresh)},
                             status=status.HTTP_201_CREATED)
@@ -108,7 +117,7 @@ class ResendPhoneConfirmationAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, *args, **kwargs):
-        VerifyPhone().send(request.user.phone)
+        verify_phone.send(request.user.phone)
         return Response({"message": _('Code was resent successfully.')}, status=status.HTTP_200_OK)
 
 
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -101,6 +102,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing is deliberately slow, the test suite does not need that
+# https://docs.djangoproject.com/en/4.0/topics/testing/overview/#password-hashing
+
+if 'test' in sys.argv:
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 